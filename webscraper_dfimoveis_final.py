@@ -22,6 +22,10 @@ from bs4 import BeautifulSoup               # O "analista" que lê o HTML e nos
 from selenium import webdriver              # O "piloto" que controla o navegador Chrome.
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait          # O "vigia" que espera a página ficar pronta.
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager # O "mecânico" que baixa e gerencia o driver do Chrome para nós.
 
 
@@ -40,6 +44,9 @@ NOME_ARQUIVO_BRUTO = 'imoveis_aluguel_df_dataset_completo.csv'
 # Isso evita que o scraper entre em um loop infinito caso algo dê errado.
 MAX_PAGINAS = 350
 
+# Tempo máximo (em segundos) que esperamos os anúncios aparecerem em cada página.
+TEMPO_MAX_ESPERA = 10
+
 
 # --- Parte 3: Montando o Robô (WebDriver) ---
 
@@ -52,6 +59,15 @@ chrome_options.add_argument("--no-sandbox")
 chrome_options.add_argument("--disable-dev-shm-usage")
 # Nosso "disfarce": enviamos um User-Agent para nos parecermos com um navegador comum.
 chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36")
+# Só precisamos do HTML: bloqueamos o download das fotos dos anúncios, que é a maior parte dos bytes de cada página.
+# Os cookies continuam liberados, pois o aquecimento da sessão depende deles.
+chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+chrome_options.add_experimental_option("prefs", {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.default_content_setting_values.cookies": 1,
+})
+# Com a estratégia 'eager', o 'driver.get' retorna assim que o DOM está pronto, sem esperar imagens e outros recursos.
+chrome_options.page_load_strategy = "eager"
 
 # Inicializamos o WebDriver, que é a ponte de comando entre nosso script e o navegador.
 # O ChromeDriverManager cuida de baixar a versão correta do "motor" do Chrome, o que é uma grande ajuda.
@@ -63,8 +79,10 @@ print("Navegador pronto para a missão!")
 
 # --- Parte 4: A Execução da Coleta ---
 
-# Uma lista vazia para guardar os dados de cada imóvel que encontrarmos.
-dados_gerais_imoveis = []
+# Os imóveis de cada página são gravados no CSV assim que a página é processada.
+# Assim a memória não cresce ao longo da coleta e, se algo falhar no meio do
+# caminho, o que já foi coletado continua salvo em disco.
+total_imoveis_salvos = 0
 pagina_atual = 1
 
 # O 'try...finally' é uma estrutura de segurança. O código dentro de 'finally'
@@ -85,14 +103,23 @@ try:
         print(f"\nNavegando para a Página {pagina_atual}...")
         driver.get(url_da_pagina)
 
-        # PAUSA ESTRATÉGICA: Esperamos um tempo aleatório para não sobrecarregar
-        # o servidor e evitar sermos identificados como um robô.
-        pausa_aleatoria = random.uniform(4, 8)
-        print(f"Pausa de {pausa_aleatoria:.2f} segundos para simular comportamento humano.")
-        time.sleep(pausa_aleatoria)
+        # ESPERA INTELIGENTE: Em vez de uma pausa fixa, esperamos apenas até o
+        # primeiro anúncio aparecer na página (ou até o tempo máximo se esgotar).
+        try:
+            WebDriverWait(driver, TEMPO_MAX_ESPERA).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, 'div.property-list__item'))
+            )
+        except TimeoutException:
+            # Sem anúncios no tempo limite: a verificação abaixo decide se a coleta terminou.
+            print(f"Nenhum anúncio apareceu em {TEMPO_MAX_ESPERA} segundos.")
+
+        # PAUSA ESTRATÉGICA: Mantemos uma pequena pausa aleatória para não
+        # sobrecarregar o servidor e evitar sermos identificados como um robô.
+        time.sleep(random.uniform(0.3, 0.8))
 
         # Entregamos o código-fonte da página (HTML) para o BeautifulSoup analisar.
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
+        # O parser 'lxml' (escrito em C) é bem mais rápido que o 'html.parser' em Python puro.
+        soup = BeautifulSoup(driver.page_source, 'lxml')
 
         # Procuramos por todos os "contêineres" de anúncios na página.
         # A classe 'property-list__item' foi identificada como o padrão para cada anúncio.
@@ -105,6 +132,9 @@ try:
 
         print(f"Encontrados {len(lista_anuncios)} anúncios. Iniciando extração de dados...")
 
+        # Uma lista vazia para guardar os dados de cada imóvel desta página.
+        imoveis_da_pagina = []
+
         # Agora, iteramos sobre cada anúncio encontrado para extrair as informações.
         for anuncio in lista_anuncios:
             try:
@@ -116,30 +146,43 @@ try:
                 
                 features_list = anuncio.find('ul', class_='property-list__features')
 
-                # Uma função auxiliar para extrair características de forma segura.
-                def get_feature(feature_name):
-                    tag = features_list.find('li', attrs={'title': feature_name})
-                    # Se a tag for encontrada, retorna o texto; senão, retorna 'N/A'.
-                    return tag.text.strip() if tag else 'N/A'
+                # Percorremos a lista de características uma única vez, indexando
+                # cada item pelo seu 'title' (ex.: 'Quartos', 'Vagas').
+                caracteristicas = {}
+                for item in features_list.find_all('li', title=True):
+                    caracteristicas.setdefault(item['title'], item.text.strip())
 
-                area = get_feature('Área útil')
-                quartos = get_feature('Quartos')
-                suites = get_feature('Suítes') # Adicionamos a extração de suítes.
-                vagas = get_feature('Vagas')
+                # Se a característica não existir no anúncio, usamos 'N/A'.
+                area = caracteristicas.get('Área útil', 'N/A')
+                quartos = caracteristicas.get('Quartos', 'N/A')
+                suites = caracteristicas.get('Suítes', 'N/A') # Adicionamos a extração de suítes.
+                vagas = caracteristicas.get('Vagas', 'N/A')
 
                 # Montamos um dicionário com os dados do imóvel.
                 imovel = {
                     'preco_anuncio': preco, 'endereco': endereco, 'area_util_m2': area,
                     'quartos': quartos, 'suites': suites, 'vagas': vagas, 'url': url_completa
                 }
-                # Adicionamos o dicionário à nossa lista geral.
-                dados_gerais_imoveis.append(imovel)
+                # Adicionamos o dicionário à lista da página.
+                imoveis_da_pagina.append(imovel)
             except AttributeError:
                 # Se um anúncio tiver uma estrutura HTML diferente e quebrada,
                 # pulamos para o próximo para não travar o script.
                 print("  -> Aviso: Um anúncio com estrutura inválida foi pulado.")
                 continue
 
+        if imoveis_da_pagina:
+            # O primeiro lote cria o arquivo (com cabeçalho); os seguintes são anexados ao final.
+            # 'index=False' evita que o índice do DataFrame seja salvo no arquivo.
+            # 'encoding='utf-8-sig'' garante compatibilidade com acentos e caracteres especiais.
+            primeiro_lote = total_imoveis_salvos == 0
+            pd.DataFrame(imoveis_da_pagina).to_csv(
+                NOME_ARQUIVO_BRUTO, mode='w' if primeiro_lote else 'a', header=primeiro_lote,
+                index=False, encoding='utf-8-sig'
+            )
+            total_imoveis_salvos += len(imoveis_da_pagina)
+            print(f"  -> {len(imoveis_da_pagina)} imóveis gravados em '{NOME_ARQUIVO_BRUTO}' (total: {total_imoveis_salvos}).")
+
         # Incrementamos o contador para ir para a próxima página no próximo loop.
         pagina_atual += 1
 
@@ -148,21 +191,12 @@ finally:
     print("\nFinalizando a sessão e fechando o navegador.")
     driver.quit()
 
-# --- Parte 5: Organizando e Salvando a Colheita ---
-
-if dados_gerais_imoveis:
-    print(f"\nCriando o DataFrame com {len(dados_gerais_imoveis)} imóveis coletados.")
-    # Transformamos nossa lista de dicionários em uma tabela do Pandas.
-    df = pd.DataFrame(dados_gerais_imoveis)
-
-    # Salvamos a tabela em um arquivo CSV.
-    # 'index=False' evita que o índice do DataFrame seja salvo no arquivo.
-    # 'encoding='utf-8-sig'' garante compatibilidade com acentos e caracteres especiais.
-    df.to_csv(NOME_ARQUIVO_BRUTO, index=False, encoding='utf-8-sig')
+# --- Parte 5: Conferindo a Colheita ---
 
-    print(f"SUCESSO! Os dados brutos foram salvos em '{NOME_ARQUIVO_BRUTO}'")
+if total_imoveis_salvos:
+    print(f"\nSUCESSO! {total_imoveis_salvos} imóveis coletados foram salvos em '{NOME_ARQUIVO_BRUTO}'")
     print("\nAmostra dos dados coletados:")
-    print(df.head()) # Mostra as 5 primeiras linhas para verificação.
+    print(pd.read_csv(NOME_ARQUIVO_BRUTO, nrows=5, encoding='utf-8-sig')) # Mostra as 5 primeiras linhas para verificação.
 else:
     print("\nAVISO: Nenhum dado foi coletado. O arquivo CSV não foi gerado.")
 